@@ -0,0 +1,127 @@
+"""Startup benchmark for the Modern Multi-Purpose Application.
+
+Builds the full application repeatedly and reports the median time spent
+in the header and in each tab builder, plus the first idle flush. Pass
+``--baseline REV`` to run the same measurements against ``program.py``
+from another git revision and print both side by side.
+
+To compare against the tabs as they were built before the shared widget
+factory, use the commit that precedes it (the persistent search index
+commit). Needs a display; on a headless machine run it under Xvfb:
+
+    xvfb-run -a python benchmark_startup.py --baseline 'HEAD^{/^\[user-026\] Add persistent}'
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tkinter as tk
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+STAGES = ('create_header', 'create_contact_manager_tab', 'create_unit_converter_tab',
+          'create_age_calculator_tab', 'create_bmi_calculator_tab')
+
+
+def load_program(source, name):
+    """Import a copy of program.py source as its own module"""
+    path = os.path.join(tempfile.mkdtemp(), name + '.py')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(source)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def revision_source(rev):
+    """Return program.py as it was at a git revision"""
+    return subprocess.check_output(['git', 'show', '%s:program.py' % rev], cwd=HERE).decode('utf-8')
+
+
+def write_contacts(count):
+    contacts = [{'name': 'Contact %d' % i,
+                 'phone': '555-%04d' % (i % 10000),
+                 'email': 'contact%d@example.com' % i,
+                 'address': '%d Example Street' % i} for i in range(count)]
+    with open('contacts.json', 'w') as f:
+        json.dump(contacts, f, indent=4)
+
+
+def measure(module, runs):
+    """Return {stage: [seconds, ...]} over several fresh application builds"""
+    app_class = module.ModernMultiApp
+    timings = {stage: [] for stage in STAGES + ('idle flush', 'total')}
+
+    originals = {stage: getattr(app_class, stage) for stage in STAGES}
+
+    def timed(stage, method):
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            result = method(self, *args, **kwargs)
+            timings[stage].append(time.perf_counter() - start)
+            return result
+        return wrapper
+
+    for stage, method in originals.items():
+        setattr(app_class, stage, timed(stage, method))
+    try:
+        # First build warms Tk and writes any on-disk index; it isn't counted
+        for run in range(runs + 1):
+            root = tk.Tk()
+            start = time.perf_counter()
+            app_class(root)
+            built = time.perf_counter()
+            root.update_idletasks()
+            done = time.perf_counter()
+            root.destroy()
+            if run == 0:
+                for values in timings.values():
+                    del values[:]
+                continue
+            timings['idle flush'].append(done - built)
+            timings['total'].append(done - start)
+    finally:
+        for stage, method in originals.items():
+            setattr(app_class, stage, method)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20, help='builds to measure (default: 20)')
+    parser.add_argument('--contacts', type=int, default=200, help='contacts in the book (default: 200)')
+    parser.add_argument('--baseline', metavar='REV', help='git revision to compare against')
+    args = parser.parse_args()
+
+    with open(os.path.join(HERE, 'program.py'), encoding='utf-8') as f:
+        candidates = [('current', load_program(f.read(), 'program_current'))]
+    if args.baseline:
+        candidates.insert(0, ('baseline', load_program(revision_source(args.baseline), 'program_baseline')))
+
+    results = []
+    workdir = os.getcwd()
+    for label, module in candidates:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                write_contacts(args.contacts)
+                results.append((label, measure(module, args.runs)))
+            finally:
+                os.chdir(workdir)
+
+    print('Median build time in ms (%d runs, %d contacts)' % (args.runs, args.contacts))
+    print('%-28s' % 'stage' + ''.join('%14s' % label for label, _ in results))
+    for stage in STAGES + ('idle flush', 'total'):
+        row = ''.join('%14.2f' % (statistics.median(timings[stage]) * 1000) for _, timings in results)
+        print('%-28s' % stage + row)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
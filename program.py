@@ -1,23 +1,935 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import tkinter.font as tkfont
 from datetime import datetime
+from array import array
+from bisect import bisect_left, bisect_right
 import json
+import mmap
 import os
+import re
+import struct
+import zlib
+
+
+class Bitset:
+    """Compressed set of non-negative integers.
+
+    Values are grouped into chunks of 65536 by their high bits, as in a
+    Roaring bitmap. A chunk with at most ARRAY_MAX members is a sorted
+    array of the low 16 bits of each, so a sparse set costs two bytes per
+    member; fuller chunks are 65536-bit Python ints that combine with a
+    single big-int operation. Empty chunks are dropped.
+
+    Set operations leave bitmap chunks as bitmaps even when they thin out,
+    since converting them costs more than the operation itself; to_bytes
+    stores every chunk in its smaller form. Chunk arrays may be shared
+    between bitsets and are never changed in place.
+    """
+
+    CHUNK_BITS = 16
+    CHUNK_MASK = (1 << CHUNK_BITS) - 1
+    CHUNK_BYTES = 1 << (CHUNK_BITS - 3)
+    # Past this many members an array would be larger than the bitmap
+    ARRAY_MAX = CHUNK_BYTES // 2
+    CHUNK_HEAD = struct.Struct('<II')   # chunk id, members
+
+    def __init__(self, chunks=None):
+        self.chunks = chunks if chunks is not None else {}
+
+    # ---------- chunk containers ----------
+    @classmethod
+    def _pack(cls, members):
+        """Return the container for a sorted list of low bits"""
+        if len(members) <= cls.ARRAY_MAX:
+            return array('H', members)
+        return int.from_bytes(cls._raw(members), 'little')
+
+    @staticmethod
+    def _count(bits):
+        """Return the number of set bits in a chunk bitmap"""
+        # int.bit_count only exists from Python 3.10
+        return bits.bit_count() if hasattr(bits, 'bit_count') else bin(bits).count('1')
+
+    @classmethod
+    def _bits(cls, container):
+        """Return a chunk as a bitmap int"""
+        if isinstance(container, int):
+            return container
+        return int.from_bytes(cls._raw(container), 'little')
+
+    @classmethod
+    def _raw(cls, container):
+        """Return a chunk, or low bits in any order, as CHUNK_BYTES of
+        little-endian bits"""
+        if isinstance(container, int):
+            return container.to_bytes(cls.CHUNK_BYTES, 'little')
+        buf = bytearray(cls.CHUNK_BYTES)
+        for bit in container:
+            buf[bit >> 3] |= 1 << (bit & 7)
+        return buf
+
+    @staticmethod
+    def _members(container):
+        """Return the sorted low bits in a chunk"""
+        if not isinstance(container, int):
+            return container
+        # Reversed binary string puts bit 0 first
+        digits = bin(container)[:1:-1]
+        members = []
+        bit = digits.find('1')
+        while bit >= 0:
+            members.append(bit)
+            bit = digits.find('1', bit + 1)
+        return members
+
+    def _store(self, chunk, container):
+        if container is None:
+            self.chunks.pop(chunk, None)
+        else:
+            self.chunks[chunk] = container
+
+    # ---------- serializing ----------
+    @classmethod
+    def from_buffer(cls, buf, offset, count):
+        """Read count serialized chunks starting at offset"""
+        chunks = {}
+        for _ in range(count):
+            chunk, members = cls.CHUNK_HEAD.unpack_from(buf, offset)
+            offset += cls.CHUNK_HEAD.size
+            if members > cls.ARRAY_MAX:
+                chunks[chunk] = int.from_bytes(buf[offset:offset + cls.CHUNK_BYTES], 'little')
+                offset += cls.CHUNK_BYTES
+            else:
+                chunks[chunk] = array('H', struct.unpack_from('<%dH' % members, buf, offset))
+                offset += 2 * members
+        return cls(chunks)
+
+    def to_bytes(self):
+        """Serialize as (chunk id, members) headers, each followed by either
+        the members as uint16s or, past ARRAY_MAX, the raw chunk bits"""
+        parts = []
+        for chunk in sorted(self.chunks):
+            container = self.chunks[chunk]
+            members = self._count(container) if isinstance(container, int) else len(container)
+            if members > self.ARRAY_MAX:
+                parts.append(self.CHUNK_HEAD.pack(chunk, members))
+                parts.append(self._raw(container))
+            else:
+                parts.append(self.CHUNK_HEAD.pack(chunk, members))
+                parts.append(struct.pack('<%dH' % members, *self._members(container)))
+        return b''.join(parts)
+
+    @classmethod
+    def from_sorted(cls, values):
+        """Build a bitset from ascending integers"""
+        chunks = {}
+        members, current = [], None
+        for value in values:
+            chunk = value >> cls.CHUNK_BITS
+            if chunk != current:
+                if members:
+                    chunks[current] = cls._pack(members)
+                members, current = [], chunk
+            members.append(value & cls.CHUNK_MASK)
+        if members:
+            chunks[current] = cls._pack(members)
+        return cls(chunks)
+
+    # ---------- set operations ----------
+    def add(self, value):
+        chunk, bit = value >> self.CHUNK_BITS, value & self.CHUNK_MASK
+        container = self.chunks.get(chunk)
+        if container is None:
+            self.chunks[chunk] = array('H', (bit,))
+        elif isinstance(container, int):
+            self.chunks[chunk] = container | (1 << bit)
+        else:
+            pos = bisect_left(container, bit)
+            if pos == len(container) or container[pos] != bit:
+                members = container.tolist()
+                members.insert(pos, bit)
+                self.chunks[chunk] = self._pack(members)
+
+    def discard(self, value):
+        chunk, bit = value >> self.CHUNK_BITS, value & self.CHUNK_MASK
+        container = self.chunks.get(chunk)
+        if container is None:
+            return
+        if isinstance(container, int):
+            self._store(chunk, container & ~(1 << bit) or None)
+        else:
+            pos = bisect_left(container, bit)
+            if pos < len(container) and container[pos] == bit:
+                self._store(chunk, container[:pos] + container[pos + 1:] if len(container) > 1 else None)
+
+    def __contains__(self, value):
+        container = self.chunks.get(value >> self.CHUNK_BITS)
+        bit = value & self.CHUNK_MASK
+        if container is None:
+            return False
+        if isinstance(container, int):
+            return bool(container >> bit & 1)
+        pos = bisect_left(container, bit)
+        return pos < len(container) and container[pos] == bit
+
+    def __and__(self, other):
+        chunks = {}
+        for chunk, mine in self.chunks.items():
+            theirs = other.chunks.get(chunk)
+            if theirs is None:
+                continue
+            if isinstance(mine, int) and isinstance(theirs, int):
+                container = mine & theirs or None
+            else:
+                if isinstance(mine, int):
+                    mine, theirs = theirs, mine
+                if isinstance(theirs, int):
+                    raw = self._raw(theirs)
+                    members = [bit for bit in mine if raw[bit >> 3] >> (bit & 7) & 1]
+                else:
+                    members = sorted(set(mine).intersection(theirs))
+                container = array('H', members) if members else None
+            if container is not None:
+                chunks[chunk] = container
+        return Bitset(chunks)
+
+    def __or__(self, other):
+        chunks = dict(self.chunks)
+        for chunk, theirs in other.chunks.items():
+            mine = chunks.get(chunk)
+            if mine is None:
+                chunks[chunk] = theirs
+            elif isinstance(mine, int) or isinstance(theirs, int):
+                chunks[chunk] = self._bits(mine) | self._bits(theirs)
+            else:
+                chunks[chunk] = self._pack(sorted(set(mine).union(theirs)))
+        return Bitset(chunks)
+
+    def __sub__(self, other):
+        chunks = {}
+        for chunk, mine in self.chunks.items():
+            theirs = other.chunks.get(chunk)
+            if theirs is None:
+                container = mine
+            elif isinstance(mine, int):
+                container = mine & ~self._bits(theirs) or None
+            else:
+                if isinstance(theirs, int):
+                    raw = self._raw(theirs)
+                    members = [bit for bit in mine if not raw[bit >> 3] >> (bit & 7) & 1]
+                else:
+                    dropped = set(theirs)
+                    members = [bit for bit in mine if bit not in dropped]
+                container = array('H', members) if members else None
+            if container is not None:
+                chunks[chunk] = container
+        return Bitset(chunks)
+
+    def __iter__(self):
+        for chunk in sorted(self.chunks):
+            base = chunk << self.CHUNK_BITS
+            for bit in self._members(self.chunks[chunk]):
+                yield base + bit
+
+    def __len__(self):
+        return sum(self._count(container) if isinstance(container, int) else len(container)
+                   for container in self.chunks.values())
+
+    def __bool__(self):
+        return bool(self.chunks)
+
+
+class ContactIndex:
+    """Persistent inverted index over contact fields.
+
+    The index lives next to the contact data (``contacts.idx`` for
+    ``contacts.json``) and records the CRC32 of the JSON snapshot it was
+    built from. On startup the file is memory-mapped and nothing is decoded
+    until it is queried. The term keys are stored back to back in sorted
+    order, so a substring search is a scan of that one mapped block rather
+    than of every contact.
+
+    Edits are kept in a small in-memory overlay and appended to a journal
+    (``contacts.idx.log``) on every save, followed by a commit record with
+    the checksum of the new snapshot. Loading replays committed journal
+    records on top of the mapped file. Once the journal grows past
+    ``COMPACT_MIN`` records or a twentieth of the contacts, it is merged
+    into a fresh index file and cleared. A full rebuild only happens when
+    neither the index file nor its journal match the contact data.
+
+    Contacts are identified by stable document ids that increase with
+    their list position, so a position is found by bisecting ``live``.
+
+    Tags are indexed as ``#tag`` terms, which no search token can match.
+    The index file also stores a Bitset per tag and one of the live
+    contacts, so boolean tag filters are evaluated with bitwise operations
+    on bitmaps read straight from the mapped file. Bitmaps that have been
+    read are kept up to date by every edit.
+    """
+
+    MAGIC = b'CIDX'
+    VERSION = 4
+    FIELDS = ('name', 'phone', 'email', 'address')
+    TAG_PREFIX = '#'
+    RESERVED_TAGS = ('and', 'or', 'not')
+
+    # magic, version, checksum, file size, live, next_id, terms, tags, live bitmap offset, chunks
+    HEADER = struct.Struct('<4sIIIIIIIII')
+    ENTRY = struct.Struct('<IIII')      # key offset, key length, postings offset, count
+    BITMAP = struct.Struct('<II')       # chunk records offset, chunk count
+
+    COMPACT_MIN = 500
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = path + '.log'
+        self.live = []
+        self.next_id = 0
+        self._mm = None
+        self._terms = 0
+        self._tags = 0
+        self._table = 0
+        self._bitmap_dir = 0
+        self._base_checksum = None
+        self._checksum = None
+        self._journaled = 0
+        self._pending = []
+        self._added = {}
+        self._removed = {}
+        self._bitmaps = {}
+        self._live_bits = None
+
+    # ---------- tokenizing ----------
+    @staticmethod
+    def tokenize(text):
+        """Split text into lowercase word tokens"""
+        return re.findall(r'\w+', text.lower())
+
+    @staticmethod
+    def split_tags(text):
+        """Split comma or space separated tags into a sorted list of unique names"""
+        return sorted(set(re.findall(r'[\w-]+', text.lower())))
+
+    def contact_terms(self, contact):
+        """Return the set of index terms for a contact"""
+        terms = set()
+        for field in self.FIELDS:
+            terms.update(self.tokenize(contact.get(field, '')))
+        digits = re.sub(r'\D', '', contact.get('phone', ''))
+        if digits:
+            terms.add(digits)
+        terms.update(self.TAG_PREFIX + tag for tag in contact.get('tags', ()))
+        return terms
+
+    # ---------- loading ----------
+    def load(self, contacts, checksum):
+        """Map the index file and replay its journal, rebuilding if they don't
+        match the snapshot"""
+        self._reset()
+        if not self._map() or not self._replay() or checksum != self._checksum or \
+                len(self.live) != len(contacts):
+            self.rebuild(contacts)
+            return False
+        return True
+
+    def _reset(self):
+        self.close()
+        self.live = []
+        self.next_id = 0
+        self._base_checksum = None
+        self._checksum = None
+        self._journaled = 0
+        self._pending = []
+        self._added = {}
+        self._removed = {}
+        self._bitmaps = {}
+        self._live_bits = None
+
+    def _map(self):
+        """Map the index file, returning False if it is missing or damaged"""
+        try:
+            with open(self.path, 'rb') as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            (magic, version, checksum, size, count, next_id,
+             terms, tags, live_off, live_chunks) = self.HEADER.unpack_from(self._mm)
+            if magic != self.MAGIC or version != self.VERSION:
+                return False
+            table = self.HEADER.size + 4 * count
+            bitmap_dir = table + self.ENTRY.size * terms
+            if len(self._mm) != size or bitmap_dir + self.BITMAP.size * tags > size:
+                return False
+            self.live = list(struct.unpack_from('<%dI' % count, self._mm, self.HEADER.size))
+            self._live_bits = Bitset.from_buffer(self._mm, live_off, live_chunks)
+        except (OSError, ValueError, struct.error):
+            return False
+        self.next_id = next_id
+        self._terms = terms
+        self._tags = tags
+        self._table = table
+        self._bitmap_dir = bitmap_dir
+        self._base_checksum = self._checksum = checksum
+        return True
+
+    def _replay(self):
+        """Apply committed journal records, dropping any uncommitted tail"""
+        try:
+            with open(self.journal_path, 'rb') as f:
+                lines = f.readlines()
+        except OSError:
+            return True
+
+        try:
+            header = json.loads(lines[0]) if lines else None
+        except ValueError:
+            header = None
+        if not header or header.get('base') != self._base_checksum:
+            # Left over from before the last compaction
+            os.remove(self.journal_path)
+            return True
+
+        batch, records, committed = [], 0, len(lines[0])
+        offset = committed
+        for line in lines[1:]:
+            offset += len(line)
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if 'commit' not in record:
+                batch.append(record)
+                continue
+            try:
+                for pending in batch:
+                    self._apply(pending)
+            except (KeyError, TypeError, IndexError):
+                return False
+            records += len(batch)
+            batch = []
+            self._checksum = record['commit']
+            committed = offset
+
+        if committed < offset or batch:
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(committed)
+        self._journaled = records
+        return True
+
+    def rebuild(self, contacts):
+        """Index every contact from scratch"""
+        self._reset()
+        # Everything gets compacted on the next save, so nothing is journaled
+        for contact in contacts:
+            self._apply({'op': 'add', 'id': self.next_id, 'post': self.contact_terms(contact)})
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._terms = 0
+        self._tags = 0
+
+    # ---------- mapped term table ----------
+    def _key_at(self, i):
+        key_off, key_len, _, _ = self.ENTRY.unpack_from(self._mm, self._table + i * self.ENTRY.size)
+        return self._mm[key_off:key_off + key_len]
+
+    def _postings_at(self, i):
+        _, _, post_off, count = self.ENTRY.unpack_from(self._mm, self._table + i * self.ENTRY.size)
+        return struct.unpack_from('<%dI' % count, self._mm, post_off)
+
+    def _lower_bound(self, key):
+        lo, hi = 0, self._terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _base_substring(self, text):
+        """Yield (term, postings) for mapped word terms containing text"""
+        if self._tags == self._terms:
+            return
+        needle = text.encode('utf-8')
+        # Keys are laid out in table order, tag terms first, so the word keys
+        # form one contiguous block ending at the last key
+        start = self.ENTRY.unpack_from(self._mm, self._table + self._tags * self.ENTRY.size)[0]
+        last_off, last_len, _, _ = self.ENTRY.unpack_from(self._mm, self._table + (self._terms - 1) * self.ENTRY.size)
+        end = last_off + last_len
+        # Views on the map must be released before it can be closed
+        with memoryview(self._mm) as mapped, \
+                mapped[self._table:self._table + self.ENTRY.size * self._terms].cast('I') as fields, \
+                fields[::4] as key_offsets:
+            i = self._tags
+            pos = self._mm.find(needle, start, end)
+            while pos >= 0:
+                i = bisect_right(key_offsets, pos, i) - 1
+                key_off, key_len, _, _ = self.ENTRY.unpack_from(self._mm, self._table + i * self.ENTRY.size)
+                if pos + len(needle) <= key_off + key_len:
+                    yield self._mm[key_off:key_off + key_len].decode('utf-8'), self._postings_at(i)
+                    # One hit per term is enough
+                    pos = self._mm.find(needle, key_off + key_len, end)
+                else:
+                    # The hit straddles two keys
+                    pos = self._mm.find(needle, pos + 1, end)
+
+    # ---------- incremental updates ----------
+    def _post(self, term, doc_id):
+        if term in self._removed:
+            self._removed[term].discard(doc_id)
+        self._added.setdefault(term, set()).add(doc_id)
+        if term in self._bitmaps:
+            self._bitmaps[term].add(doc_id)
+
+    def _unpost(self, term, doc_id):
+        if term in self._added:
+            self._added[term].discard(doc_id)
+        self._removed.setdefault(term, set()).add(doc_id)
+        if term in self._bitmaps:
+            self._bitmaps[term].discard(doc_id)
+
+    def _apply(self, record):
+        """Apply one journal record to the in-memory state"""
+        doc_id = record['id']
+        op = record['op']
+        if op == 'add':
+            self.live.append(doc_id)
+            self.next_id = max(self.next_id, doc_id + 1)
+            if self._live_bits is not None:
+                self._live_bits.add(doc_id)
+        elif op == 'delete':
+            del self.live[bisect_left(self.live, doc_id)]
+            if self._live_bits is not None:
+                self._live_bits.discard(doc_id)
+        for term in record.get('unpost', ()):
+            self._unpost(term, doc_id)
+        for term in record.get('post', ()):
+            self._post(term, doc_id)
+
+    def _record(self, record):
+        self._apply(record)
+        self._pending.append(record)
+
+    def add(self, contact):
+        """Index a contact appended to the end of the list"""
+        self._record({'op': 'add', 'id': self.next_id, 'post': sorted(self.contact_terms(contact))})
+
+    def update(self, index, old_contact, new_contact):
+        """Re-index the contact at a list position"""
+        old_terms = self.contact_terms(old_contact)
+        new_terms = self.contact_terms(new_contact)
+        self._record({'op': 'update', 'id': self.live[index],
+                      'unpost': sorted(old_terms - new_terms), 'post': sorted(new_terms - old_terms)})
+
+    def delete(self, index, contact):
+        """Drop the contact at a list position"""
+        self._record({'op': 'delete', 'id': self.live[index], 'unpost': sorted(self.contact_terms(contact))})
+
+    # ---------- querying ----------
+    def lookup(self, text):
+        """Return the set of document ids with a word term containing text"""
+        ids = set()
+        for term, postings in self._base_substring(text):
+            removed = self._removed.get(term)
+            ids.update(postings if not removed else set(postings) - removed)
+        for term, added in self._added.items():
+            if text in term and not term.startswith(self.TAG_PREFIX):
+                ids.update(added)
+        return ids
+
+    def tag_bitmap(self, tag):
+        """Return the bitmap of contacts carrying a tag"""
+        term = self.TAG_PREFIX + tag
+        bitmap = self._bitmaps.get(term)
+        if bitmap is not None:
+            return bitmap
+
+        key = term.encode('utf-8')
+        i = self._lower_bound(key)
+        added = self._added.get(term)
+        if i < self._tags and self._key_at(i) == key:
+            offset, chunks = self.BITMAP.unpack_from(self._mm, self._bitmap_dir + i * self.BITMAP.size)
+            bitmap = Bitset.from_buffer(self._mm, offset, chunks)
+        elif added:
+            bitmap = Bitset()
+        else:
+            # Unknown tags, such as half-typed ones, are never cached
+            return Bitset()
+        if term in self._removed:
+            bitmap = bitmap - Bitset.from_sorted(sorted(self._removed[term]))
+        if added:
+            bitmap = bitmap | Bitset.from_sorted(sorted(added))
+        self._bitmaps[term] = bitmap
+        return bitmap
+
+    def live_bitmap(self):
+        """Return the bitmap of every contact still in the list"""
+        if self._live_bits is None:
+            self._live_bits = Bitset.from_sorted(self.live)
+        return self._live_bits
+
+    def filter_tags(self, expression):
+        """Evaluate a tag filter such as 'customers AND region-east NOT archived'.
+
+        AND, OR and NOT are case-insensitive and parentheses group terms.
+        Adjacent tags are AND-ed and ``a NOT b`` means ``a AND NOT b``.
+        Raises ValueError for a malformed filter.
+        """
+        tokens = []
+        for match in re.finditer(r'\s*(?:([()])|([\w-]+)|(\S))', expression.lower()):
+            if match.group(3):
+                raise ValueError('Unexpected %r in tag filter' % match.group(3))
+            tokens.append(match.group(1) or match.group(2))
+        pos = 0
+
+        def peek():
+            return tokens[pos] if pos < len(tokens) else None
+
+        def take():
+            nonlocal pos
+            pos += 1
+            return tokens[pos - 1]
+
+        def factor():
+            token = peek()
+            if token is None or token in (')', 'and', 'or'):
+                raise ValueError('Tag filter is incomplete')
+            take()
+            if token == 'not':
+                return self.live_bitmap() - factor()
+            if token == '(':
+                result = disjunction()
+                if peek() != ')':
+                    raise ValueError('Missing ) in tag filter')
+                take()
+                return result
+            return self.tag_bitmap(token)
+
+        def conjunction():
+            result = factor()
+            while peek() not in (None, ')', 'or'):
+                if peek() == 'and':
+                    take()
+                result = result & factor()
+            return result
+
+        def disjunction():
+            result = conjunction()
+            while peek() == 'or':
+                take()
+                result = result | conjunction()
+            return result
+
+        result = disjunction()
+        if pos != len(tokens):
+            raise ValueError('Unbalanced ) in tag filter')
+        return result
+
+    def positions(self, ids):
+        """Map document ids to sorted list positions, skipping deleted ones"""
+        if self.live and self.live[-1] == len(self.live) - 1:
+            # No gaps in the ids, so every id is its own position
+            return sorted(ids)
+        result = []
+        for doc_id in ids:
+            pos = bisect_left(self.live, doc_id)
+            if pos < len(self.live) and self.live[pos] == doc_id:
+                result.append(pos)
+        result.sort()
+        return result
+
+    def search(self, query, tag_filter=''):
+        """Return positions of contacts with a word containing every query
+        token that also match the tag filter, if one is given"""
+        ids = None
+        for token in sorted(set(self.tokenize(query)), key=len, reverse=True):
+            matches = self.lookup(token)
+            ids = matches if ids is None else ids & matches
+            if not ids:
+                break
+
+        if tag_filter.strip():
+            tagged = self.filter_tags(tag_filter)
+            if ids is not None:
+                tagged = tagged & Bitset.from_sorted(sorted(ids))
+            return self.positions(tagged)
+        if ids is None:
+            return list(range(len(self.live)))
+        return self.positions(ids)
+
+    # ---------- saving ----------
+    def save(self, checksum):
+        """Persist the edits made since the last save for the snapshot with
+        this checksum, compacting the journal once it has grown large"""
+        if self._mm is None or self._journaled + len(self._pending) > max(self.COMPACT_MIN, len(self.live) // 20):
+            self.compact(checksum)
+            return
+
+        lines = [json.dumps(record) + '\n' for record in self._pending]
+        lines.append(json.dumps({'commit': checksum}) + '\n')
+        if not self._journaled and not os.path.exists(self.journal_path):
+            lines.insert(0, json.dumps({'base': self._base_checksum}) + '\n')
+        with open(self.journal_path, 'a') as f:
+            f.write(''.join(lines))
+        self._journaled += len(self._pending)
+        self._pending = []
+        self._checksum = checksum
+
+    def _merged_terms(self):
+        """Yield (key, packed postings) for the mapped table plus the overlay"""
+        pending = set(self._added)
+        touched = set(term.encode('utf-8') for term in pending.union(self._removed))
+        table = self._mm[self._table:self._table + self.ENTRY.size * self._terms] if self._terms else b''
+        for key_off, key_len, post_off, count in self.ENTRY.iter_unpack(table):
+            key = self._mm[key_off:key_off + key_len]
+            if key not in touched:
+                # Untouched terms are copied across without decoding postings
+                yield key, self._mm[post_off:post_off + 4 * count]
+                continue
+            term = key.decode('utf-8')
+            postings = set(struct.unpack_from('<%dI' % count, self._mm, post_off))
+            postings -= self._removed.get(term, set())
+            postings |= self._added.get(term, set())
+            pending.discard(term)
+            if postings:
+                yield key, struct.pack('<%dI' % len(postings), *sorted(postings))
+        for term in pending:
+            postings = self._added[term]
+            if postings:
+                yield term.encode('utf-8'), struct.pack('<%dI' % len(postings), *sorted(postings))
+
+    def compact(self, checksum):
+        """Merge the overlay into a fresh index file and clear the journal"""
+        entries = sorted(self._merged_terms())
+        # The prefix sorts before every word character, so tag terms lead the table
+        prefix = self.TAG_PREFIX.encode('utf-8')
+        bitsets = [self.tag_bitmap(key[len(prefix):].decode('utf-8'))
+                   for key, _ in entries if key.startswith(prefix)]
+        bitsets.append(self.live_bitmap())
+        bitmaps = [bitset.to_bytes() for bitset in bitsets]
+
+        count = len(self.live)
+        table = self.HEADER.size + 4 * count
+        bitmap_dir = table + self.ENTRY.size * len(entries)
+        keys = bitmap_dir + self.BITMAP.size * (len(bitmaps) - 1)
+        posts = keys + sum(len(key) for key, _ in entries)
+        chunks = posts + sum(len(postings) for _, postings in entries)
+        size = chunks + sum(len(bitmap) for bitmap in bitmaps)
+        live_off = size - len(bitmaps[-1])
+
+        parts = [self.HEADER.pack(self.MAGIC, self.VERSION, checksum, size, count, self.next_id, len(entries),
+                                  len(bitmaps) - 1, live_off, len(bitsets[-1].chunks)),
+                 struct.pack('<%dI' % count, *self.live)]
+        key_off, post_off = keys, posts
+        for key, postings in entries:
+            parts.append(self.ENTRY.pack(key_off, len(key), post_off, len(postings) // 4))
+            key_off += len(key)
+            post_off += len(postings)
+        for bitset, bitmap in zip(bitsets[:-1], bitmaps):
+            parts.append(self.BITMAP.pack(chunks, len(bitset.chunks)))
+            chunks += len(bitmap)
+        parts.extend(key for key, _ in entries)
+        parts.extend(postings for _, postings in entries)
+        parts.extend(bitmaps)
+
+        # Release the old mapping before replacing the file it points at
+        self.close()
+        self._added = {}
+        self._removed = {}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(tmp_path, self.path)
+        # A journal whose base checksum no longer matches is ignored on load
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+        with open(self.path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._terms = len(entries)
+        self._tags = len(bitmaps) - 1
+        self._table = table
+        self._bitmap_dir = bitmap_dir
+        self._base_checksum = self._checksum = checksum
+        self._journaled = 0
+        self._pending = []
+
+
+class WidgetFactory:
+    """Shared fonts, colors and option sets for building themed widgets.
+
+    Everything that used to be worked out per widget is prepared once per
+    Tk root: named fonts, ttk styles, the hover/pressed shade of every
+    button color and the option dicts handed to each widget constructor.
+    Button hover effects come from a single class binding instead of two
+    lambdas per button.
+    """
+
+    FONTS = {
+        'Modern.Display': ('Helvetica', 28, 'bold'),
+        'Modern.Title': ('Arial', 22, 'bold'),
+        'Modern.Heading': ('Arial', 16, 'bold'),
+        'Modern.Icon': ('Arial', 14, 'normal'),
+        'Modern.Section': ('Arial', 13, 'bold'),
+        'Modern.Subheading': ('Arial', 12, 'bold'),
+        'Modern.Large': ('Arial', 12, 'normal'),
+        'Modern.Strong': ('Arial', 11, 'bold'),
+        'Modern.Body': ('Arial', 11, 'normal'),
+        'Modern.Label': ('Arial', 10, 'bold'),
+        'Modern.Small': ('Arial', 10, 'normal'),
+    }
+
+    # Every button color used by the tabs; shades are precomputed for these
+    BUTTON_COLORS = ('#28a745', '#007bff', '#ffc107', '#dc3545', '#e94560', '#9c27b0', '#ff5722')
+
+    ENTRY_OPTIONS = {
+        'font': 'Modern.Body',
+        'bg': '#ffffff',
+        'fg': '#16213e',
+        'relief': tk.FLAT,
+        'bd': 2,
+        'highlightthickness': 2,
+        'highlightcolor': '#e94560',
+        'highlightbackground': '#d1d1d1',
+    }
+
+    BUTTON_OPTIONS = {
+        'font': 'Modern.Strong',
+        'fg': '#ffffff',
+        'activeforeground': '#ffffff',
+        'bd': 0,
+        'padx': 20,
+        'pady': 12,
+        'cursor': 'hand2',
+        'relief': tk.FLAT,
+    }
+
+    def __init__(self, root):
+        self.root = root
+        self.fonts = {}
+        self.shades = {}
+        self.entry_options = dict(self.ENTRY_OPTIONS, insertbackground='#e94560')
+        self.text_options = dict(self.ENTRY_OPTIONS)
+
+        self.register_fonts()
+        self.register_styles()
+        for color in self.BUTTON_COLORS:
+            self.shade(color)
+
+        root.bind_class('ModernButton', '<Enter>', lambda e: e.widget.config(bg=e.widget.hover_bg))
+        root.bind_class('ModernButton', '<Leave>', lambda e: e.widget.config(bg=e.widget.normal_bg))
+
+    def register_fonts(self):
+        """Create the named fonts widgets refer to"""
+        # A Font object deletes its Tk font when it is garbage collected, so
+        # the factory holds on to every one it creates
+        existing = set(tkfont.names(self.root))
+        for name, (family, size, weight) in self.FONTS.items():
+            if name in existing:
+                self.fonts[name] = tkfont.Font(self.root, name=name, exists=True)
+            else:
+                self.fonts[name] = tkfont.Font(self.root, name=name, family=family, size=size, weight=weight)
+
+    def register_styles(self):
+        """Configure modern ttk styles"""
+        style = ttk.Style(self.root)
+        style.theme_use('clam')
+        
+        # Notebook style
+        style.configure('Modern.TNotebook', background='#16213e', borderwidth=0)
+        style.configure('Modern.TNotebook.Tab', 
+                       background='#0f3460',
+                       foreground='#ffffff',
+                       padding=[20, 10],
+                       font='Modern.Label')
+        style.map('Modern.TNotebook.Tab',
+                 background=[('selected', '#e94560')],
+                 foreground=[('selected', '#ffffff')])
+        
+        # Combobox style
+        style.configure('Modern.TCombobox',
+                       fieldbackground='#ffffff',
+                       background='#e94560',
+                       foreground='#16213e',
+                       arrowcolor='#ffffff',
+                       borderwidth=0)
+
+    # ---------- colors ----------
+    def shade(self, hex_color):
+        """Return the cached (hover, pressed) colors for a base color"""
+        shades = self.shades.get(hex_color)
+        if shades is None:
+            shades = self.shades[hex_color] = (self.lighten_color(hex_color), self.darken_color(hex_color))
+        return shades
+
+    @classmethod
+    def lighten_color(cls, hex_color):
+        """Lighten a hex color"""
+        # Simple lightening by increasing RGB values
+        rgb = cls.hex_to_rgb(hex_color)
+        lighter = tuple(min(255, int(c * 1.2)) for c in rgb)
+        return cls.rgb_to_hex(lighter)
+
+    @classmethod
+    def darken_color(cls, hex_color):
+        """Darken a hex color"""
+        rgb = cls.hex_to_rgb(hex_color)
+        darker = tuple(max(0, int(c * 0.8)) for c in rgb)
+        return cls.rgb_to_hex(darker)
+
+    @staticmethod
+    def hex_to_rgb(hex_color):
+        """Convert hex to RGB"""
+        hex_color = hex_color.lstrip('#')
+        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+    @staticmethod
+    def rgb_to_hex(rgb):
+        """Convert RGB to hex"""
+        return '#%02x%02x%02x' % rgb
+
+    # ---------- widgets ----------
+    def button(self, parent, text, command, bg_color, width=20):
+        """Create a modern styled button with hover effect"""
+        hover, pressed = self.shade(bg_color)
+        button = tk.Button(parent, text=text, command=command, width=width, bg=bg_color,
+                           activebackground=pressed, **self.BUTTON_OPTIONS)
+        button.normal_bg = bg_color
+        button.hover_bg = hover
+        button.bindtags(('ModernButton',) + button.bindtags())
+        return button
+
+    def entry(self, parent, width=30):
+        """Create modern styled entry"""
+        return tk.Entry(parent, width=width, **self.entry_options)
+
+    def text(self, parent, width, height):
+        """Create modern styled multi-line text box"""
+        return tk.Text(parent, width=width, height=height, **self.text_options)
+
+    def label(self, parent, text, font='Modern.Label', bg='#ffffff', fg='#16213e', **options):
+        """Create a label in a named font; fg=None keeps Tk's default color"""
+        if fg is not None:
+            options['fg'] = fg
+        return tk.Label(parent, text=text, font=font, bg=bg, **options)
 
 
 class ModernMultiApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Modern Multi-Purpose Application")
-        self.root.geometry("900x700")
+        self.root.geometry("900x780")
         self.root.config(bg="#1a1a2e")
         
         # Data file for contacts
         self.data_file = "contacts.json"
+        self.index = ContactIndex(os.path.splitext(self.data_file)[0] + '.idx')
         self.contacts = self.load_contacts()
         
-        # Configure modern styles
-        self.configure_styles()
+        # Shared fonts, ttk styles and widget option sets
+        self.theme = WidgetFactory(self.root)
         
         # Create Header
         self.create_header()
@@ -32,30 +944,6 @@ class ModernMultiApp:
         self.create_age_calculator_tab()
         self.create_bmi_calculator_tab()
     
-    def configure_styles(self):
-        """Configure modern ttk styles"""
-        style = ttk.Style()
-        style.theme_use('clam')
-        
-        # Notebook style
-        style.configure('Modern.TNotebook', background='#16213e', borderwidth=0)
-        style.configure('Modern.TNotebook.Tab', 
-                       background='#0f3460',
-                       foreground='#ffffff',
-                       padding=[20, 10],
-                       font=('Arial', 10, 'bold'))
-        style.map('Modern.TNotebook.Tab',
-                 background=[('selected', '#e94560')],
-                 foreground=[('selected', '#ffffff')])
-        
-        # Combobox style
-        style.configure('Modern.TCombobox',
-                       fieldbackground='#ffffff',
-                       background='#e94560',
-                       foreground='#16213e',
-                       arrowcolor='#ffffff',
-                       borderwidth=0)
-    
     def create_header(self):
         """Create modern gradient-like header"""
         header_frame = tk.Frame(self.root, bg='#e94560', height=100)
@@ -63,20 +951,20 @@ class ModernMultiApp:
         header_frame.pack_propagate(False)
         
         # Title with modern font
-        title = tk.Label(
+        title = self.create_modern_label(
             header_frame,
-            text="🚀 Modern Multi-Purpose App",
-            font=('Helvetica', 28, 'bold'),
+            "🚀 Modern Multi-Purpose App",
+            font='Modern.Display',
             bg='#e94560',
             fg='#ffffff'
         )
         title.pack(pady=20)
         
         # Subtitle
-        subtitle = tk.Label(
+        subtitle = self.create_modern_label(
             header_frame,
-            text="Contacts • Converters • Calculators • All in One Place",
-            font=('Arial', 11),
+            "Contacts • Converters • Calculators • All in One Place",
+            font='Modern.Body',
             bg='#e94560',
             fg='#ffffff'
         )
@@ -84,67 +972,15 @@ class ModernMultiApp:
     
     def create_modern_button(self, parent, text, command, bg_color, width=20):
         """Create a modern styled button with hover effect"""
-        button = tk.Button(
-            parent,
-            text=text,
-            font=('Arial', 11, 'bold'),
-            bg=bg_color,
-            fg='#ffffff',
-            activebackground=self.darken_color(bg_color),
-            activeforeground='#ffffff',
-            bd=0,
-            padx=20,
-            pady=12,
-            cursor='hand2',
-            relief=tk.FLAT,
-            width=width,
-            command=command
-        )
-        
-        # Hover effects
-        button.bind('<Enter>', lambda e: button.config(bg=self.lighten_color(bg_color)))
-        button.bind('<Leave>', lambda e: button.config(bg=bg_color))
-        
-        return button
-    
-    def lighten_color(self, hex_color):
-        """Lighten a hex color"""
-        # Simple lightening by increasing RGB values
-        rgb = self.hex_to_rgb(hex_color)
-        lighter = tuple(min(255, int(c * 1.2)) for c in rgb)
-        return self.rgb_to_hex(lighter)
-    
-    def darken_color(self, hex_color):
-        """Darken a hex color"""
-        rgb = self.hex_to_rgb(hex_color)
-        darker = tuple(max(0, int(c * 0.8)) for c in rgb)
-        return self.rgb_to_hex(darker)
-    
-    def hex_to_rgb(self, hex_color):
-        """Convert hex to RGB"""
-        hex_color = hex_color.lstrip('#')
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-    
-    def rgb_to_hex(self, rgb):
-        """Convert RGB to hex"""
-        return '#%02x%02x%02x' % rgb
+        return self.theme.button(parent, text, command, bg_color, width)
     
     def create_modern_entry(self, parent, width=30):
         """Create modern styled entry"""
-        entry = tk.Entry(
-            parent,
-            font=('Arial', 11),
-            bg='#ffffff',
-            fg='#16213e',
-            insertbackground='#e94560',
-            relief=tk.FLAT,
-            bd=2,
-            highlightthickness=2,
-            highlightcolor='#e94560',
-            highlightbackground='#d1d1d1',
-            width=width
-        )
-        return entry
+        return self.theme.entry(parent, width)
+    
+    def create_modern_label(self, parent, text, font='Modern.Label', bg='#ffffff', fg='#16213e', **options):
+        """Create modern styled label"""
+        return self.theme.label(parent, text, font, bg, fg, **options)
     
     # ============================================
     # TAB 1: CONTACT MANAGER
@@ -162,13 +998,7 @@ class ModernMultiApp:
         left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 10))
         
         # Form title
-        form_title = tk.Label(
-            left_frame,
-            text='Contact Details',
-            font=('Arial', 16, 'bold'),
-            bg='#ffffff',
-            fg='#16213e'
-        )
+        form_title = self.create_modern_label(left_frame, 'Contact Details', font='Modern.Heading')
         form_title.pack(pady=(20, 15))
         
         # Input fields container
@@ -176,41 +1006,30 @@ class ModernMultiApp:
         inputs_frame.pack(padx=30, pady=10, fill=tk.BOTH, expand=True)
         
         # Name
-        tk.Label(inputs_frame, text='Full Name', font=('Arial', 10, 'bold'), 
-                bg='#ffffff', fg='#16213e').grid(row=0, column=0, sticky='w', pady=(10, 5))
+        self.create_modern_label(inputs_frame, 'Full Name').grid(row=0, column=0, sticky='w', pady=(10, 5))
         self.name_entry = self.create_modern_entry(inputs_frame, 35)
         self.name_entry.grid(row=1, column=0, pady=(0, 15), ipady=5)
         
         # Phone
-        tk.Label(inputs_frame, text='Phone Number', font=('Arial', 10, 'bold'),
-                bg='#ffffff', fg='#16213e').grid(row=2, column=0, sticky='w', pady=(10, 5))
+        self.create_modern_label(inputs_frame, 'Phone Number').grid(row=2, column=0, sticky='w', pady=(10, 5))
         self.phone_entry = self.create_modern_entry(inputs_frame, 35)
         self.phone_entry.grid(row=3, column=0, pady=(0, 15), ipady=5)
         
         # Email
-        tk.Label(inputs_frame, text='Email Address', font=('Arial', 10, 'bold'),
-                bg='#ffffff', fg='#16213e').grid(row=4, column=0, sticky='w', pady=(10, 5))
+        self.create_modern_label(inputs_frame, 'Email Address').grid(row=4, column=0, sticky='w', pady=(10, 5))
         self.email_entry = self.create_modern_entry(inputs_frame, 35)
         self.email_entry.grid(row=5, column=0, pady=(0, 15), ipady=5)
         
         # Address
-        tk.Label(inputs_frame, text='Address', font=('Arial', 10, 'bold'),
-                bg='#ffffff', fg='#16213e').grid(row=6, column=0, sticky='w', pady=(10, 5))
-        self.address_text = tk.Text(
-            inputs_frame,
-            font=('Arial', 11),
-            bg='#ffffff',
-            fg='#16213e',
-            relief=tk.FLAT,
-            bd=2,
-            highlightthickness=2,
-            highlightcolor='#e94560',
-            highlightbackground='#d1d1d1',
-            width=35,
-            height=4
-        )
+        self.create_modern_label(inputs_frame, 'Address').grid(row=6, column=0, sticky='w', pady=(10, 5))
+        self.address_text = self.theme.text(inputs_frame, width=35, height=4)
         self.address_text.grid(row=7, column=0, pady=(0, 15))
         
+        # Tags
+        self.create_modern_label(inputs_frame, 'Tags (comma separated)').grid(row=8, column=0, sticky='w', pady=(10, 5))
+        self.tags_entry = self.create_modern_entry(inputs_frame, 35)
+        self.tags_entry.grid(row=9, column=0, pady=(0, 15), ipady=5)
+        
         # Buttons
         button_frame = tk.Frame(left_frame, bg='#ffffff')
         button_frame.pack(pady=20)
@@ -224,24 +1043,27 @@ class ModernMultiApp:
         right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
         
         # List title
-        list_title = tk.Label(
-            right_frame,
-            text='Contact List',
-            font=('Arial', 16, 'bold'),
-            bg='#ffffff',
-            fg='#16213e'
-        )
+        list_title = self.create_modern_label(right_frame, 'Contact List', font='Modern.Heading')
         list_title.pack(pady=(20, 10))
         
         # Search
         search_container = tk.Frame(right_frame, bg='#ffffff')
-        search_container.pack(fill='x', padx=20, pady=(0, 15))
+        search_container.pack(fill='x', padx=20, pady=(0, 8))
         
-        tk.Label(search_container, text='🔍', font=('Arial', 14), bg='#ffffff').pack(side=tk.LEFT, padx=(0, 5))
+        self.create_modern_label(search_container, '🔍', font='Modern.Icon', fg=None).pack(side=tk.LEFT, padx=(0, 5))
         self.search_entry = self.create_modern_entry(search_container, 30)
         self.search_entry.pack(side=tk.LEFT, fill='x', expand=True, ipady=5)
         self.search_entry.bind('<KeyRelease>', lambda e: self.search_contacts())
         
+        # Tag filter, e.g. "customers AND region-east NOT archived"
+        tag_container = tk.Frame(right_frame, bg='#ffffff')
+        tag_container.pack(fill='x', padx=20, pady=(0, 15))
+        
+        self.create_modern_label(tag_container, '🏷', font='Modern.Icon', fg=None).pack(side=tk.LEFT, padx=(0, 5))
+        self.tag_filter_entry = self.create_modern_entry(tag_container, 30)
+        self.tag_filter_entry.pack(side=tk.LEFT, fill='x', expand=True, ipady=5)
+        self.tag_filter_entry.bind('<KeyRelease>', lambda e: self.search_contacts())
+        
         # Treeview
         tree_container = tk.Frame(right_frame, bg='#ffffff')
         tree_container.pack(fill=tk.BOTH, expand=True, padx=20)
@@ -251,7 +1073,7 @@ class ModernMultiApp:
         
         self.tree = ttk.Treeview(
             tree_container,
-            columns=('Name', 'Phone', 'Email'),
+            columns=('Name', 'Phone', 'Email', 'Tags'),
             show='headings',
             yscrollcommand=scrollbar.set,
             height=12
@@ -261,10 +1083,12 @@ class ModernMultiApp:
         self.tree.heading('Name', text='Name')
         self.tree.heading('Phone', text='Phone')
         self.tree.heading('Email', text='Email')
+        self.tree.heading('Tags', text='Tags')
         
-        self.tree.column('Name', width=150)
-        self.tree.column('Phone', width=120)
-        self.tree.column('Email', width=180)
+        self.tree.column('Name', width=140)
+        self.tree.column('Phone', width=110)
+        self.tree.column('Email', width=160)
+        self.tree.column('Tags', width=120)
         
         self.tree.pack(fill=tk.BOTH, expand=True)
         self.tree.bind('<ButtonRelease-1>', self.on_select)
@@ -277,52 +1101,79 @@ class ModernMultiApp:
     # Contact Manager Methods
     def load_contacts(self):
         if os.path.exists(self.data_file):
-            with open(self.data_file, 'r') as f:
-                return json.load(f)
+            with open(self.data_file, 'rb') as f:
+                data = f.read()
+            contacts = json.loads(data)
+            # Reuse the on-disk index unless it was built from other data
+            if not self.index.load(contacts, zlib.crc32(data)):
+                self.index.save(zlib.crc32(data))
+            return contacts
         return []
     
     def save_contacts(self):
-        with open(self.data_file, 'w') as f:
-            json.dump(self.contacts, f, indent=4)
+        data = json.dumps(self.contacts, indent=4).encode('utf-8')
+        with open(self.data_file, 'wb') as f:
+            f.write(data)
+        self.index.save(zlib.crc32(data))
     
     def add_contact(self):
         name = self.name_entry.get().strip()
         phone = self.phone_entry.get().strip()
         email = self.email_entry.get().strip()
         address = self.address_text.get('1.0', tk.END).strip()
+        tags = self.index.split_tags(self.tags_entry.get())
         
         if not name:
             messagebox.showerror('Error', 'Name is required!')
             return
         
-        self.contacts.append({'name': name, 'phone': phone, 'email': email, 'address': address})
+        if not self.check_tags(tags):
+            return
+        
+        contact = {'name': name, 'phone': phone, 'email': email, 'address': address, 'tags': tags}
+        self.contacts.append(contact)
+        self.index.add(contact)
         self.save_contacts()
-        self.refresh_contact_list()
+        self.search_contacts(edited=True)
         self.clear_fields()
         messagebox.showinfo('Success', 'Contact added successfully! ✓')
     
+    def check_tags(self, tags):
+        reserved = [tag for tag in tags if tag in self.index.RESERVED_TAGS]
+        if reserved:
+            messagebox.showerror('Error', 'Tags cannot be named AND, OR or NOT - they are filter keywords!')
+            return False
+        return True
+    
     def update_contact(self):
         selected = self.tree.selection()
         if not selected:
             messagebox.showerror('Error', 'Please select a contact to update!')
             return
         
-        index = self.tree.index(selected[0])
+        index = int(selected[0])
         name = self.name_entry.get().strip()
+        tags = self.index.split_tags(self.tags_entry.get())
         
         if not name:
             messagebox.showerror('Error', 'Name is required!')
             return
         
-        self.contacts[index] = {
+        if not self.check_tags(tags):
+            return
+        
+        contact = {
             'name': name,
             'phone': self.phone_entry.get().strip(),
             'email': self.email_entry.get().strip(),
-            'address': self.address_text.get('1.0', tk.END).strip()
+            'address': self.address_text.get('1.0', tk.END).strip(),
+            'tags': tags
         }
+        self.index.update(index, self.contacts[index], contact)
+        self.contacts[index] = contact
         
         self.save_contacts()
-        self.refresh_contact_list()
+        self.search_contacts(edited=True)
         self.clear_fields()
         messagebox.showinfo('Success', 'Contact updated successfully! ✓')
     
@@ -333,34 +1184,48 @@ class ModernMultiApp:
             return
         
         if messagebox.askyesno('Confirm', 'Delete this contact?'):
-            index = self.tree.index(selected[0])
+            index = int(selected[0])
+            self.index.delete(index, self.contacts[index])
             del self.contacts[index]
             self.save_contacts()
-            self.refresh_contact_list()
+            self.search_contacts(edited=True)
             self.clear_fields()
             messagebox.showinfo('Success', 'Contact deleted! ✓')
     
+    def contact_row(self, contact):
+        return (contact['name'], contact['phone'], contact['email'], ', '.join(contact.get('tags', ())))
+    
     def refresh_contact_list(self):
         for item in self.tree.get_children():
             self.tree.delete(item)
         
-        for contact in self.contacts:
-            self.tree.insert('', tk.END, values=(contact['name'], contact['phone'], contact['email']))
+        for index, contact in enumerate(self.contacts):
+            self.tree.insert('', tk.END, iid=str(index), values=self.contact_row(contact))
     
-    def search_contacts(self):
-        search_term = self.search_entry.get().lower()
+    def search_contacts(self, edited=False):
+        try:
+            matches = self.index.search(self.search_entry.get(), self.tag_filter_entry.get())
+        except ValueError:
+            self.tag_filter_entry.config(highlightbackground='#dc3545', highlightcolor='#dc3545')
+            if not edited:
+                # Leave the list alone while a tag filter is still being typed
+                return
+            # Row ids are stale after an edit, so fall back to the text search
+            matches = self.index.search(self.search_entry.get())
+        else:
+            self.tag_filter_entry.config(highlightbackground='#d1d1d1', highlightcolor='#e94560')
         
         for item in self.tree.get_children():
             self.tree.delete(item)
         
-        for contact in self.contacts:
-            if search_term in contact['name'].lower():
-                self.tree.insert('', tk.END, values=(contact['name'], contact['phone'], contact['email']))
+        # Row ids are list positions so selection still works on filtered views
+        for index in matches:
+            self.tree.insert('', tk.END, iid=str(index), values=self.contact_row(self.contacts[index]))
     
     def on_select(self, event):
         selected = self.tree.selection()
         if selected:
-            index = self.tree.index(selected[0])
+            index = int(selected[0])
             contact = self.contacts[index]
             
             self.clear_fields()
@@ -368,12 +1233,14 @@ class ModernMultiApp:
             self.phone_entry.insert(0, contact['phone'])
             self.email_entry.insert(0, contact['email'])
             self.address_text.insert('1.0', contact['address'])
+            self.tags_entry.insert(0, ', '.join(contact.get('tags', ())))
     
     def clear_fields(self):
         self.name_entry.delete(0, tk.END)
         self.phone_entry.delete(0, tk.END)
         self.email_entry.delete(0, tk.END)
         self.address_text.delete('1.0', tk.END)
+        self.tags_entry.delete(0, tk.END)
     
     # ============================================
     # TAB 2: UNIT CONVERTER
@@ -386,25 +1253,18 @@ class ModernMultiApp:
         container.place(relx=0.5, rely=0.5, anchor='center', width=600, height=500)
         
         # Title with icon
-        tk.Label(
-            container,
-            text='⚡ Unit Converter',
-            font=('Arial', 22, 'bold'),
-            bg='#ffffff',
-            fg='#16213e'
-        ).pack(pady=(30, 20))
+        self.create_modern_label(container, '⚡ Unit Converter', font='Modern.Title').pack(pady=(30, 20))
         
         # Conversion type
         type_frame = tk.Frame(container, bg='#ffffff')
         type_frame.pack(pady=15)
         
-        tk.Label(type_frame, text='Conversion Type:', font=('Arial', 12, 'bold'),
-                bg='#ffffff', fg='#16213e').pack(side=tk.LEFT, padx=10)
+        self.create_modern_label(type_frame, 'Conversion Type:', font='Modern.Subheading').pack(side=tk.LEFT, padx=10)
         
         self.conversion_type = ttk.Combobox(
             type_frame,
             values=['Temperature', 'Weight', 'Length'],
-            font=('Arial', 11),
+            font='Modern.Body',
             state='readonly',
             width=18,
             style='Modern.TCombobox'
@@ -418,22 +1278,19 @@ class ModernMultiApp:
         input_container.pack(pady=20, padx=40, fill='x')
         
         # Value
-        tk.Label(input_container, text='Value:', font=('Arial', 11, 'bold'),
-                bg='#f8f9fa', fg='#16213e').pack(anchor='w', pady=(15, 5), padx=20)
+        self.create_modern_label(input_container, 'Value:', font='Modern.Strong', bg='#f8f9fa').pack(anchor='w', pady=(15, 5), padx=20)
         self.unit_value = self.create_modern_entry(input_container, 40)
         self.unit_value.pack(pady=(0, 15), padx=20, ipady=8)
         
         # From
-        tk.Label(input_container, text='From:', font=('Arial', 11, 'bold'),
-                bg='#f8f9fa', fg='#16213e').pack(anchor='w', pady=(10, 5), padx=20)
-        self.from_unit = ttk.Combobox(input_container, font=('Arial', 11),
+        self.create_modern_label(input_container, 'From:', font='Modern.Strong', bg='#f8f9fa').pack(anchor='w', pady=(10, 5), padx=20)
+        self.from_unit = ttk.Combobox(input_container, font='Modern.Body',
                                      state='readonly', width=38, style='Modern.TCombobox')
         self.from_unit.pack(pady=(0, 15), padx=20)
         
         # To
-        tk.Label(input_container, text='To:', font=('Arial', 11, 'bold'),
-                bg='#f8f9fa', fg='#16213e').pack(anchor='w', pady=(10, 5), padx=20)
-        self.to_unit = ttk.Combobox(input_container, font=('Arial', 11),
+        self.create_modern_label(input_container, 'To:', font='Modern.Strong', bg='#f8f9fa').pack(anchor='w', pady=(10, 5), padx=20)
+        self.to_unit = ttk.Combobox(input_container, font='Modern.Body',
                                     state='readonly', width=38, style='Modern.TCombobox')
         self.to_unit.pack(pady=(0, 15), padx=20)
         
@@ -441,10 +1298,10 @@ class ModernMultiApp:
         self.create_modern_button(container, '🔄 Convert Now', self.convert_units, '#e94560', 20).pack(pady=20)
         
         # Result
-        self.unit_result = tk.Label(
+        self.unit_result = self.create_modern_label(
             container,
-            text='Result will appear here',
-            font=('Arial', 13, 'bold'),
+            'Result will appear here',
+            font='Modern.Section',
             bg='#e8f5e9',
             fg='#2e7d32',
             relief=tk.FLAT,
@@ -527,39 +1384,32 @@ class ModernMultiApp:
         container = tk.Frame(age_frame, bg='#ffffff')
         container.place(relx=0.5, rely=0.5, anchor='center', width=550, height=500)
         
-        tk.Label(
-            container,
-            text='🎂 Age Calculator',
-            font=('Arial', 22, 'bold'),
-            bg='#ffffff',
-            fg='#16213e'
-        ).pack(pady=(30, 30))
+        self.create_modern_label(container, '🎂 Age Calculator', font='Modern.Title').pack(pady=(30, 30))
         
         # Date inputs
         input_frame = tk.Frame(container, bg='#f8f9fa')
         input_frame.pack(pady=20, padx=40, fill='x')
         
-        tk.Label(input_frame, text='Enter Your Birth Date', font=('Arial', 13, 'bold'),
-                bg='#f8f9fa', fg='#16213e').pack(pady=(20, 15))
+        self.create_modern_label(input_frame, 'Enter Your Birth Date', font='Modern.Section', bg='#f8f9fa').pack(pady=(20, 15))
         
         dob_frame = tk.Frame(input_frame, bg='#f8f9fa')
         dob_frame.pack(pady=15)
         
         # Day
-        tk.Label(dob_frame, text='Day', font=('Arial', 10), bg='#f8f9fa').grid(row=0, column=0, padx=10)
-        self.birth_day = tk.Spinbox(dob_frame, from_=1, to=31, width=8, font=('Arial', 12),
+        self.create_modern_label(dob_frame, 'Day', font='Modern.Small', bg='#f8f9fa', fg=None).grid(row=0, column=0, padx=10)
+        self.birth_day = tk.Spinbox(dob_frame, from_=1, to=31, width=8, font='Modern.Large',
                                     relief=tk.FLAT, bd=2, highlightthickness=1)
         self.birth_day.grid(row=1, column=0, padx=10, pady=5)
         
         # Month
-        tk.Label(dob_frame, text='Month', font=('Arial', 10), bg='#f8f9fa').grid(row=0, column=1, padx=10)
-        self.birth_month = tk.Spinbox(dob_frame, from_=1, to=12, width=8, font=('Arial', 12),
+        self.create_modern_label(dob_frame, 'Month', font='Modern.Small', bg='#f8f9fa', fg=None).grid(row=0, column=1, padx=10)
+        self.birth_month = tk.Spinbox(dob_frame, from_=1, to=12, width=8, font='Modern.Large',
                                       relief=tk.FLAT, bd=2, highlightthickness=1)
         self.birth_month.grid(row=1, column=1, padx=10, pady=5)
         
         # Year
-        tk.Label(dob_frame, text='Year', font=('Arial', 10), bg='#f8f9fa').grid(row=0, column=2, padx=10)
-        self.birth_year = tk.Spinbox(dob_frame, from_=1900, to=2025, width=10, font=('Arial', 12),
+        self.create_modern_label(dob_frame, 'Year', font='Modern.Small', bg='#f8f9fa', fg=None).grid(row=0, column=2, padx=10)
+        self.birth_year = tk.Spinbox(dob_frame, from_=1900, to=2025, width=10, font='Modern.Large',
                                      relief=tk.FLAT, bd=2, highlightthickness=1)
         self.birth_year.delete(0, tk.END)
         self.birth_year.insert(0, '2000')
@@ -570,10 +1420,10 @@ class ModernMultiApp:
         self.create_modern_button(container, '📊 Calculate Age', self.calculate_age, '#9c27b0', 18).pack(pady=25)
         
         # Result
-        self.age_result = tk.Label(
+        self.age_result = self.create_modern_label(
             container,
-            text='Your age will be displayed here',
-            font=('Arial', 12),
+            'Your age will be displayed here',
+            font='Modern.Large',
             bg='#f3e5f5',
             fg='#6a1b9a',
             justify=tk.LEFT,
@@ -629,33 +1479,26 @@ class ModernMultiApp:
         container = tk.Frame(bmi_frame, bg='#ffffff')
         container.place(relx=0.5, rely=0.5, anchor='center', width=550, height=500)
         
-        tk.Label(
-            container,
-            text='💪 BMI Calculator',
-            font=('Arial', 22, 'bold'),
-            bg='#ffffff',
-            fg='#16213e'
-        ).pack(pady=(30, 25))
+        self.create_modern_label(container, '💪 BMI Calculator', font='Modern.Title').pack(pady=(30, 25))
         
         # Input frame
         input_frame = tk.Frame(container, bg='#f8f9fa')
         input_frame.pack(pady=20, padx=40, fill='x')
         
-        tk.Label(input_frame, text='Enter Your Details', font=('Arial', 13, 'bold'),
-                bg='#f8f9fa', fg='#16213e').pack(pady=(20, 20))
+        self.create_modern_label(input_frame, 'Enter Your Details', font='Modern.Section', bg='#f8f9fa').pack(pady=(20, 20))
         
         # Weight
         weight_frame = tk.Frame(input_frame, bg='#f8f9fa')
         weight_frame.pack(pady=10)
         
-        tk.Label(weight_frame, text='Weight:', font=('Arial', 11, 'bold'),
-                bg='#f8f9fa', fg='#16213e', width=10, anchor='w').pack(side=tk.LEFT, padx=5)
+        self.create_modern_label(weight_frame, 'Weight:', font='Modern.Strong', bg='#f8f9fa',
+                                 width=10, anchor='w').pack(side=tk.LEFT, padx=5)
         
         self.weight_entry = self.create_modern_entry(weight_frame, 15)
         self.weight_entry.pack(side=tk.LEFT, padx=5, ipady=5)
         
         self.weight_unit = ttk.Combobox(weight_frame, values=['kg', 'lbs'],
-                                       font=('Arial', 10), state='readonly', width=8)
+                                       font='Modern.Small', state='readonly', width=8)
         self.weight_unit.pack(side=tk.LEFT, padx=5)
         self.weight_unit.current(0)
         
@@ -663,14 +1506,14 @@ class ModernMultiApp:
         height_frame = tk.Frame(input_frame, bg='#f8f9fa')
         height_frame.pack(pady=10)
         
-        tk.Label(height_frame, text='Height:', font=('Arial', 11, 'bold'),
-                bg='#f8f9fa', fg='#16213e', width=10, anchor='w').pack(side=tk.LEFT, padx=5)
+        self.create_modern_label(height_frame, 'Height:', font='Modern.Strong', bg='#f8f9fa',
+                                 width=10, anchor='w').pack(side=tk.LEFT, padx=5)
         
         self.height_entry = self.create_modern_entry(height_frame, 15)
         self.height_entry.pack(side=tk.LEFT, padx=5, ipady=5)
         
         self.height_unit = ttk.Combobox(height_frame, values=['cm', 'meters', 'feet'],
-                                       font=('Arial', 10), state='readonly', width=8)
+                                       font='Modern.Small', state='readonly', width=8)
         self.height_unit.pack(side=tk.LEFT, padx=5)
         self.height_unit.current(0)
         
@@ -679,10 +1522,10 @@ class ModernMultiApp:
         self.create_modern_button(container, '⚡ Calculate BMI', self.calculate_bmi, '#ff5722', 18).pack(pady=25)
         
         # Result
-        self.bmi_result = tk.Label(
+        self.bmi_result = self.create_modern_label(
             container,
-            text='Your BMI will be displayed here',
-            font=('Arial', 12),
+            'Your BMI will be displayed here',
+            font='Modern.Large',
             bg='#fff3e0',
             fg='#e65100',
             justify=tk.LEFT,
@@ -0,0 +1,434 @@
+"""Replay recorded UI sessions against the real application and time them.
+
+Each action in a session is injected into a live ModernMultiApp with
+event_generate (keystrokes into the search box, clicks on Treeview rows,
+buttons and notebook tabs). The clock starts just before the events are
+queued and stops once Tk has no more pending events or idle callbacks and
+a round trip to the X server has come back, so the server has processed
+every drawing request of the resulting redraw. Under Xvfb that means the
+pixels are in its framebuffer; on a real display, compositing and the
+monitor refresh come on top and are not measured. Latencies are reported
+as p50/p95/p99 per action type.
+
+Sessions are JSON lists of actions:
+
+    {"action": "type", "text": "smith"}            one sample per keystroke
+    {"action": "erase", "count": 5}                BackSpace in the search box
+    {"action": "select", "row": 3}                 click a visible contact row
+    {"action": "add", "contact": {...}}            fill the form, click Add
+    {"action": "update", "row": 2, "contact": {...}}
+    {"action": "delete", "row": 0}                 update/delete select their row untimed
+    {"action": "tab", "index": 1}                  click a notebook tab
+
+Without --session a random session is generated; --dump-session writes
+it out so it can be edited and replayed. If $DISPLAY is unset an Xvfb
+server is started for the run.
+
+--record FILE opens the application on the same synthetic book and logs
+what you do in it as a session: characters and BackSpace typed into the
+search box, row clicks, Add/Update/Delete clicks with the form contents
+and tab switches. Other keys, such as cursor movement or pasting, and the
+tag filter box are not recorded. Replay it with the same --contacts and
+--seed so the rows line up.
+
+    python replay_sessions.py --contacts 10000 --actions 400
+    python replay_sessions.py --contacts 10000 --record my_session.json
+    python replay_sessions.py --contacts 10000 --session my_session.json
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tkinter as tk
+from types import SimpleNamespace
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+FIRST_NAMES = ('Alice', 'Bob', 'Carol', 'David', 'Erin', 'Frank', 'Grace', 'Heidi',
+               'Ivan', 'Judy', 'Mallory', 'Niaj', 'Olivia', 'Peggy', 'Rupert', 'Sybil')
+LAST_NAMES = ('Smith', 'Johnson', 'Brown', 'Taylor', 'Anderson', 'Thomas', 'Moore',
+              'Martin', 'Lee', 'Walker', 'Young', 'King', 'Wright', 'Scott', 'Green')
+CITIES = ('London', 'Paris', 'Berlin', 'Madrid', 'Rome', 'Oslo', 'Vienna', 'Dublin')
+
+KEYSYMS = {' ': 'space', '@': 'at', '.': 'period', '-': 'minus', ',': 'comma', '_': 'underscore'}
+
+
+# ============================================
+# SYNTHETIC DATA
+# ============================================
+def synthetic_contact(rng, i):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {'name': '%s %s' % (first, last),
+            'phone': '555-%04d' % rng.randrange(10000),
+            'email': '%s.%s%d@example.com' % (first.lower(), last.lower(), i),
+            'address': '%d %s Road, %s' % (rng.randrange(1, 500), rng.choice(LAST_NAMES), rng.choice(CITIES))}
+
+
+def synthetic_book(count, seed):
+    rng = random.Random(seed)
+    return [synthetic_contact(rng, i) for i in range(count)]
+
+
+def synthetic_session(length, seed):
+    """Generate a session that mixes searching, browsing and editing"""
+    rng = random.Random(seed)
+    session = []
+    while len(session) < length:
+        roll = rng.random()
+        if roll < 0.45:
+            query = rng.choice(FIRST_NAMES + LAST_NAMES + CITIES).lower()[:rng.randint(2, 6)]
+            session.append({'action': 'type', 'text': query})
+            session.append({'action': 'erase', 'count': len(query)})
+        elif roll < 0.7:
+            session.append({'action': 'select', 'row': rng.randrange(20)})
+        elif roll < 0.8:
+            session.append({'action': 'add', 'contact': synthetic_contact(rng, rng.randrange(10 ** 6))})
+        elif roll < 0.88:
+            session.append({'action': 'update', 'row': rng.randrange(20),
+                            'contact': synthetic_contact(rng, rng.randrange(10 ** 6))})
+        elif roll < 0.93:
+            session.append({'action': 'delete', 'row': rng.randrange(20)})
+        else:
+            session.append({'action': 'tab', 'index': rng.randrange(1, 4)})
+            session.append({'action': 'tab', 'index': 0})
+    return session
+
+
+# ============================================
+# DISPLAY
+# ============================================
+def start_xvfb():
+    """Start Xvfb on a free display and point $DISPLAY at it"""
+    read_fd, write_fd = os.pipe()
+    try:
+        server = subprocess.Popen(['Xvfb', '-displayfd', str(write_fd), '-screen', '0', '1280x1024x24',
+                                   '-nolisten', 'tcp'], pass_fds=(write_fd,),
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        sys.exit('No $DISPLAY and Xvfb is not installed')
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        display = f.readline().strip()
+    if not display:
+        server.kill()
+        server.wait()
+        sys.exit('Xvfb failed to start')
+    os.environ['DISPLAY'] = ':' + display
+    return server
+
+
+# ============================================
+# WIDGETS
+# ============================================
+def find_buttons(widget, buttons=None):
+    """Return {text: widget} for every tk.Button below widget"""
+    buttons = {} if buttons is None else buttons
+    for child in widget.winfo_children():
+        if isinstance(child, tk.Button):
+            buttons[child.cget('text')] = child
+        find_buttons(child, buttons)
+    return buttons
+
+
+def find_button(buttons, prefix):
+    return next(button for text, button in buttons.items() if text.startswith(prefix))
+
+
+# ============================================
+# RECORD
+# ============================================
+class Recorder:
+    """Log interactions with a live ModernMultiApp as a session"""
+
+    EDITS = (('✓ Add', 'add'), ('✎ Update', 'update'), ('🗑 Delete', 'delete'))
+
+    def __init__(self, program):
+        self.root = tk.Tk()
+        self.app = program.ModernMultiApp(self.root)
+        self.session = []
+        self.tab = 0
+        buttons = find_buttons(self.root)
+        for prefix, action in self.EDITS:
+            # Widget bindings run before the Button class binding that invokes
+            # the command, so the form still holds what is about to be saved
+            find_button(buttons, prefix).bind('<ButtonRelease-1>',
+                                              lambda e, action=action: self.on_edit(e, action), add='+')
+        self.app.search_entry.bind('<KeyPress>', self.on_key, add='+')
+        self.app.tree.bind('<ButtonPress-1>', self.on_row, add='+')
+        self.app.notebook.bind('<<NotebookTabChanged>>', self.on_tab, add='+')
+
+    def log(self, action, key, value):
+        """Append an action, merging runs of typing or erasing into one"""
+        last = self.session[-1] if self.session else None
+        if last and last['action'] == action and action in ('type', 'erase'):
+            last[key] += value
+        else:
+            self.session.append({'action': action, key: value})
+
+    def selected_row(self):
+        selection = self.app.tree.selection()
+        return self.app.tree.index(selection[0]) if selection else None
+
+    def on_key(self, event):
+        if event.keysym == 'BackSpace':
+            self.log('erase', 'count', 1)
+        elif event.char and (event.char.isascii() and event.char.isalnum() or event.char in KEYSYMS):
+            self.log('type', 'text', event.char)
+
+    def on_row(self, event):
+        iid = self.app.tree.identify_row(event.y)
+        if iid:
+            self.log('select', 'row', self.app.tree.index(iid))
+
+    def on_edit(self, event, action):
+        if not (0 <= event.x < event.widget.winfo_width() and 0 <= event.y < event.widget.winfo_height()):
+            # Released outside the button, so it doesn't fire
+            return
+        contact = {'name': self.app.name_entry.get(),
+                   'phone': self.app.phone_entry.get(),
+                   'email': self.app.email_entry.get(),
+                   'address': self.app.address_text.get('1.0', 'end-1c'),
+                   'tags': self.app.index.split_tags(self.app.tags_entry.get())}
+        row = self.selected_row()
+        if action == 'add':
+            self.session.append({'action': 'add', 'contact': contact})
+        elif row is not None:
+            step = {'action': action, 'row': row}
+            if action == 'update':
+                step['contact'] = contact
+            self.session.append(step)
+
+    def on_tab(self, event):
+        index = self.app.notebook.index('current')
+        if index != self.tab:
+            self.log('tab', 'index', index)
+            self.tab = index
+
+    def run(self):
+        self.root.mainloop()
+        return self.session
+
+
+# ============================================
+# REPLAY
+# ============================================
+class Replayer:
+    """Drive a live ModernMultiApp and time each injected interaction"""
+
+    def __init__(self, program):
+        # Dialogs are answered immediately so the replay never blocks on a modal window
+        program.messagebox = SimpleNamespace(showinfo=lambda *a, **k: 'ok',
+                                             showerror=lambda *a, **k: 'ok',
+                                             askyesno=lambda *a, **k: True)
+        self.root = tk.Tk()
+        self.app = program.ModernMultiApp(self.root)
+        self.buttons = find_buttons(self.root)
+        self.samples = {}
+        self.settle()
+        self.root.focus_force()
+        self.settle()
+
+    def settle(self):
+        """Run Tk until no events or idle callbacks are left and the X server
+        has processed everything sent to it"""
+        self.root.update()
+        # Xlib buffers requests, so an empty local queue says nothing about
+        # the server. A reply only comes back once every request queued ahead
+        # of it, including the redraw, has been handled.
+        self.root.winfo_pointerxy()
+
+    def timed(self, kind, inject):
+        start = time.perf_counter()
+        inject()
+        self.settle()
+        self.samples.setdefault(kind, []).append(time.perf_counter() - start)
+
+    # ---------- low level events ----------
+    def focus(self, widget):
+        # Key events only reach the widget that holds the focus
+        widget.focus_force()
+        self.settle()
+
+    def key(self, widget, keysym):
+        widget.event_generate('<KeyPress>', keysym=keysym, when='tail')
+        widget.event_generate('<KeyRelease>', keysym=keysym, when='tail')
+
+    def click(self, widget, x, y):
+        widget.event_generate('<Enter>', x=x, y=y, when='tail')
+        widget.event_generate('<ButtonPress-1>', x=x, y=y, button=1, when='tail')
+        widget.event_generate('<ButtonRelease-1>', x=x, y=y, button=1, when='tail')
+
+    def click_button(self, prefix):
+        button = find_button(self.buttons, prefix)
+        self.click(button, button.winfo_width() // 2, button.winfo_height() // 2)
+
+    def row_point(self, row):
+        """Scroll a visible tree row into view and return its iid and centre"""
+        rows = self.app.tree.get_children()
+        if not rows:
+            return None
+        iid = rows[row % len(rows)]
+        self.app.tree.see(iid)
+        self.settle()
+        box = self.app.tree.bbox(iid)
+        if not box:
+            # The contact list isn't on screen, e.g. another tab is selected
+            return None
+        x, y, width, height = box
+        return iid, x + width // 2, y + height // 2
+
+    def tab_point(self, index):
+        """Find a point on a notebook tab label"""
+        notebook = self.app.notebook
+        for x in range(2, notebook.winfo_width(), 4):
+            for y in (5, 10, 15, 20):
+                try:
+                    if notebook.index('@%d,%d' % (x, y)) == index:
+                        return x, y
+                except tk.TclError:
+                    pass
+        raise RuntimeError('tab %d not found' % index)
+
+    # ---------- actions ----------
+    def fill_form(self, contact):
+        self.app.clear_fields()
+        self.app.name_entry.insert(0, contact['name'])
+        self.app.phone_entry.insert(0, contact['phone'])
+        self.app.email_entry.insert(0, contact['email'])
+        self.app.address_text.insert('1.0', contact['address'])
+        self.app.tags_entry.insert(0, ', '.join(contact.get('tags', ())))
+
+    def select_row(self, row, kind='select'):
+        """Click a row; kind=None is an untimed click ahead of an edit"""
+        point = self.row_point(row)
+        if point:
+            _, x, y = point
+            if kind:
+                self.timed(kind, lambda: self.click(self.app.tree, x, y))
+            else:
+                self.click(self.app.tree, x, y)
+                self.settle()
+        return point
+
+    def run(self, session):
+        entry = self.app.search_entry
+        for step in session:
+            action = step['action']
+            if action == 'type':
+                self.focus(entry)
+                for char in step['text']:
+                    keysym = KEYSYMS.get(char, char)
+                    self.timed('type', lambda: self.key(entry, keysym))
+            elif action == 'erase':
+                self.focus(entry)
+                for _ in range(step['count']):
+                    self.timed('type', lambda: self.key(entry, 'BackSpace'))
+            elif action == 'select':
+                self.select_row(step['row'])
+            elif action == 'add':
+                self.fill_form(step['contact'])
+                self.timed('add', lambda: self.click_button('✓ Add'))
+            elif action == 'update':
+                if self.select_row(step['row'], kind=None):
+                    self.fill_form(step['contact'])
+                    self.timed('update', lambda: self.click_button('✎ Update'))
+            elif action == 'delete':
+                if self.select_row(step['row'], kind=None):
+                    self.timed('delete', lambda: self.click_button('🗑 Delete'))
+            elif action == 'tab':
+                x, y = self.tab_point(step['index'])
+                self.timed('tab', lambda: self.click(self.app.notebook, x, y))
+            else:
+                raise ValueError('unknown action %r' % action)
+
+    def close(self):
+        self.root.destroy()
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def report(samples, contacts):
+    print('Interaction latency in ms (%d contacts)' % contacts)
+    print('%-10s%8s%10s%10s%10s' % ('action', 'count', 'p50', 'p95', 'p99'))
+    for kind in sorted(samples):
+        values = samples[kind]
+        print('%-10s%8d%10.2f%10.2f%10.2f' % (kind, len(values), percentile(values, 50) * 1000,
+                                             percentile(values, 95) * 1000, percentile(values, 99) * 1000))
+
+
+def replay(program, session):
+    replayer = Replayer(program)
+    try:
+        replayer.run(session)
+    finally:
+        replayer.close()
+    return replayer.samples
+
+
+def run_in_book(args, work):
+    """Call work(program) in a scratch directory holding the synthetic book"""
+    sys.path.insert(0, HERE)
+    import program
+
+    workdir = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            with open('contacts.json', 'w') as f:
+                json.dump(synthetic_book(args.contacts, args.seed), f, indent=4)
+            return work(program)
+        finally:
+            os.chdir(workdir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--contacts', type=int, default=1000, help='size of the synthetic book (default: 1000)')
+    parser.add_argument('--session', help='JSON session file to replay')
+    parser.add_argument('--actions', type=int, default=200, help='length of a generated session (default: 200)')
+    parser.add_argument('--seed', type=int, default=0, help='seed for generated data (default: 0)')
+    parser.add_argument('--dump-session', metavar='FILE', help='write the session being replayed to FILE')
+    parser.add_argument('--record', metavar='FILE', help='record your own session to FILE instead of replaying')
+    args = parser.parse_args()
+
+    if args.record:
+        if not os.environ.get('DISPLAY'):
+            sys.exit('--record needs a display to interact with')
+        session = run_in_book(args, lambda program: Recorder(program).run())
+        with open(args.record, 'w') as f:
+            json.dump(session, f, indent=4)
+        print('Recorded %d actions to %s' % (len(session), args.record))
+        return 0
+
+    if args.session:
+        with open(args.session) as f:
+            session = json.load(f)
+    else:
+        session = synthetic_session(args.actions, args.seed)
+    if args.dump_session:
+        with open(args.dump_session, 'w') as f:
+            json.dump(session, f, indent=4)
+
+    server = start_xvfb() if not os.environ.get('DISPLAY') else None
+    try:
+        samples = run_in_book(args, lambda program: replay(program, session))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    report(samples, args.contacts)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
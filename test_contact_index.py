@@ -0,0 +1,245 @@
+"""Tests for the persistent contact search index.
+
+Run with ``python -m unittest`` (or pytest) from the project directory.
+"""
+import os
+import random
+import re
+import shutil
+import tempfile
+import unittest
+
+from program import Bitset, ContactIndex
+
+TAGS = ('customers', 'region-east', 'region-west', 'archived', 'vip')
+
+# Tag filters with the brute-force test a contact's tag set must pass
+FILTERS = (
+    ('vip', lambda tags: 'vip' in tags),
+    ('customers AND region-east NOT archived',
+     lambda tags: 'customers' in tags and 'region-east' in tags and 'archived' not in tags),
+    ('(vip OR customers) and not region-west',
+     lambda tags: ('vip' in tags or 'customers' in tags) and 'region-west' not in tags),
+    ('NOT archived', lambda tags: 'archived' not in tags),
+    ('vip region-east', lambda tags: 'vip' in tags and 'region-east' in tags),
+    ('unknown OR vip', lambda tags: 'vip' in tags),
+)
+
+WORDS = ('john', 'johnny', 'jane', 'smith', 'smithers', 'doe', 'lee', 'london', 'paris', 'oslo',
+         'example', 'mail', 'road', 'street', 'anna', 'hannah')
+
+
+def make_contact(rng):
+    first, last = rng.choice(WORDS).title(), rng.choice(WORDS).title()
+    return {'name': '%s %s' % (first, last),
+            'phone': '555-%04d' % rng.randrange(10000),
+            'email': '%s.%s@%s.com' % (first.lower(), last.lower(), rng.choice(WORDS)),
+            'address': '%d %s Road, %s' % (rng.randrange(1, 100), rng.choice(WORDS).title(), rng.choice(WORDS).title()),
+            'tags': sorted(tag for tag in TAGS if rng.random() < 0.3)}
+
+
+def brute_force(contacts, query):
+    """Positions of contacts where every query word is inside some word of the contact"""
+    tokens = ContactIndex.tokenize(query)
+    result = []
+    for pos, contact in enumerate(contacts):
+        words = set()
+        for field in ContactIndex.FIELDS:
+            words.update(ContactIndex.tokenize(contact[field]))
+        words.add(re.sub(r'\D', '', contact['phone']))
+        if all(any(token in word for word in words) for token in tokens):
+            result.append(pos)
+    return result
+
+
+class ContactIndexTest(unittest.TestCase):
+    QUERIES = ('', 'john', 'ohn', 'smith', 'mith', 'ann', 'jo sm', 'road lon', '555', '12', 'xyz', 'on')
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'contacts.idx')
+        self.rng = random.Random(1234)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def open_index(self, contacts, checksum):
+        index = ContactIndex(self.path)
+        reused = index.load(contacts, checksum)
+        if not reused:
+            index.save(checksum)
+        return index, reused
+
+    def assert_matches(self, index, contacts):
+        for query in self.QUERIES:
+            self.assertEqual(index.search(query), brute_force(contacts, query), query)
+        matches = set(brute_force(contacts, 'ann'))
+        for expression, test in FILTERS:
+            tagged = [pos for pos, contact in enumerate(contacts) if test(set(contact['tags']))]
+            self.assertEqual(index.search('', expression), tagged, expression)
+            self.assertEqual(index.search('ann', expression), [pos for pos in tagged if pos in matches], expression)
+
+    def edit(self, index, contacts):
+        """Apply one random add, update or delete to both the index and the list"""
+        roll = self.rng.random()
+        if roll < 0.5 or not contacts:
+            contact = make_contact(self.rng)
+            contacts.append(contact)
+            index.add(contact)
+        elif roll < 0.8:
+            pos = self.rng.randrange(len(contacts))
+            contact = make_contact(self.rng)
+            index.update(pos, contacts[pos], contact)
+            contacts[pos] = contact
+        else:
+            pos = self.rng.randrange(len(contacts))
+            index.delete(pos, contacts.pop(pos))
+
+    def test_substring_search(self):
+        contacts = [make_contact(self.rng) for _ in range(50)]
+        contacts[0]['name'] = 'John Smith'
+        index, _ = self.open_index(contacts, 1)
+        self.assertIn(0, index.search('ohn'))
+        self.assertIn(0, index.search('OHN MIT'))
+        self.assert_matches(index, contacts)
+
+    def test_random_edits_survive_reload(self):
+        contacts = [make_contact(self.rng) for _ in range(200)]
+        index, _ = self.open_index(contacts, 0)
+        checksum = 0
+        for _ in range(30):
+            for _ in range(self.rng.randrange(1, 10)):
+                self.edit(index, contacts)
+            self.assert_matches(index, contacts)
+            checksum += 1
+            index.save(checksum)
+            index.close()
+            index, reused = self.open_index(contacts, checksum)
+            self.assertTrue(reused)
+            self.assert_matches(index, contacts)
+        index.close()
+
+    def test_compaction(self):
+        contacts = [make_contact(self.rng) for _ in range(20)]
+        index, _ = self.open_index(contacts, 0)
+        for checksum in range(1, ContactIndex.COMPACT_MIN + 20):
+            self.edit(index, contacts)
+            index.save(checksum)
+        self.assertLess(index._journaled, ContactIndex.COMPACT_MIN)
+        self.assert_matches(index, contacts)
+        index.close()
+        index, reused = self.open_index(contacts, checksum)
+        self.assertTrue(reused)
+        self.assert_matches(index, contacts)
+        index.close()
+
+    def test_uncommitted_journal_tail_is_dropped(self):
+        contacts = [make_contact(self.rng) for _ in range(20)]
+        index, _ = self.open_index(contacts, 0)
+        self.edit(index, contacts)
+        index.save(1)
+        index.close()
+        with open(index.journal_path, 'rb') as f:
+            committed = f.read()
+        with open(index.journal_path, 'a') as f:
+            f.write('{"op": "add", "id": 999, "post": ["zzz"]}\n{"op": "ad')
+
+        index, reused = self.open_index(contacts, 1)
+        self.assertTrue(reused)
+        self.assertEqual(index.search('zzz'), [])
+        self.assert_matches(index, contacts)
+        index.close()
+        with open(index.journal_path, 'rb') as f:
+            self.assertEqual(f.read(), committed)
+
+    def test_stale_checksum_rebuilds(self):
+        contacts = [make_contact(self.rng) for _ in range(20)]
+        self.open_index(contacts, 0)[0].close()
+        contacts.append(make_contact(self.rng))
+        index, reused = self.open_index(contacts, 5)
+        self.assertFalse(reused)
+        self.assert_matches(index, contacts)
+        index.close()
+
+    def test_malformed_tag_filters(self):
+        index, _ = self.open_index([make_contact(self.rng)], 0)
+        for expression in ('vip AND', '(vip', 'vip)', 'NOT', 'vip & archived'):
+            with self.assertRaises(ValueError, msg=expression):
+                index.filter_tags(expression)
+        index.close()
+
+    def test_damaged_file_rebuilds(self):
+        contacts = [make_contact(self.rng) for _ in range(20)]
+        self.open_index(contacts, 0)[0].close()
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        for size in (0, 30, 200, len(data) - 1):
+            with open(self.path, 'wb') as f:
+                f.write(data[:size])
+            index, reused = self.open_index(contacts, 0)
+            self.assertFalse(reused, size)
+            self.assert_matches(index, contacts)
+            index.close()
+
+
+class BitsetTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(99)
+
+    def random_values(self):
+        """Values mixing empty, sparse and dense chunks"""
+        values = set()
+        for chunk in self.rng.sample(range(6), 4):
+            size = self.rng.choice((1, 50, Bitset.ARRAY_MAX, Bitset.ARRAY_MAX + 1, 30000))
+            values.update((chunk << Bitset.CHUNK_BITS) + bit for bit in self.rng.sample(range(1 << Bitset.CHUNK_BITS), size))
+        return values
+
+    def assert_bitset(self, bitset, values):
+        self.assertEqual(list(bitset), sorted(values))
+        self.assertEqual(len(bitset), len(values))
+        stored = Bitset.from_buffer(bitset.to_bytes(), 0, len(bitset.chunks))
+        self.assertEqual(list(stored), sorted(values))
+        for container in stored.chunks.values():
+            # Stored chunks use the smaller container for their size
+            self.assertEqual(isinstance(container, int), len(Bitset({0: container})) > Bitset.ARRAY_MAX)
+
+    def test_set_operations(self):
+        for _ in range(10):
+            a, b = self.random_values(), self.random_values()
+            x, y = Bitset.from_sorted(sorted(a)), Bitset.from_sorted(sorted(b))
+            self.assert_bitset(x & y, a & b)
+            self.assert_bitset(x | y, a | b)
+            self.assert_bitset(x - y, a - b)
+            self.assert_bitset(y - x, b - a)
+            self.assert_bitset(x, a)
+
+    def test_add_and_discard(self):
+        values = set(range(Bitset.ARRAY_MAX - 2))
+        bitset = Bitset.from_sorted(sorted(values))
+        shared = bitset | Bitset()
+        for value in range(Bitset.ARRAY_MAX - 5, Bitset.ARRAY_MAX + 5):
+            bitset.add(value)
+            values.add(value)
+            self.assert_bitset(bitset, values)
+        for value in self.rng.sample(sorted(values), 50):
+            bitset.discard(value)
+            values.discard(value)
+            self.assert_bitset(bitset, values)
+            self.assertNotIn(value, bitset)
+        # Arrays are copied on write, so other bitsets sharing them don't change
+        self.assert_bitset(shared, range(Bitset.ARRAY_MAX - 2))
+
+    def test_serialization(self):
+        values = self.random_values()
+        data = Bitset.from_sorted(sorted(values)).to_bytes()
+        buf = b'xx' + data
+        bitset = Bitset.from_buffer(buf, 2, len(Bitset.from_sorted(sorted(values)).chunks))
+        self.assert_bitset(bitset, values)
+
+    def test_sparse_chunks_are_small(self):
+        data = Bitset.from_sorted(range(0, 1 << 20, 1 << 12)).to_bytes()
+        self.assertEqual(len(data), 16 * (Bitset.CHUNK_HEAD.size + 2 * 16))
+
+
+if __name__ == '__main__':
+    unittest.main()